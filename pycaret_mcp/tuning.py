@@ -0,0 +1,561 @@
+"""Budget-aware hyperparameter search for the PyCaret training scripts.
+
+`tune_model` scores every sampled configuration on the full cross-validation.
+The search here uses successive halving instead: candidates start on a small
+subsample scored with a few folds, and only the best ``1/eta`` of each rung are
+promoted to a larger sample and more folds. Losing trials are never run on the
+full budget. `hyperband` runs several halving brackets with different starting
+rungs so that aggressive early stopping does not discard slow starters.
+
+Trials run in parallel on local cores (joblib). A trial budget shrinks the
+brackets so that the last rung is still reached; a wall-clock budget stops the
+search when it is spent.
+"""
+from __future__ import annotations
+
+import importlib
+import math
+import os
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.base import clone, is_classifier
+from sklearn.exceptions import FitFailedWarning
+from sklearn.metrics import check_scoring
+from sklearn.model_selection import KFold, ParameterSampler, StratifiedKFold
+
+# Smallest test fold a rung may use: scores on a handful of rows tie too
+# often to rank candidates.
+MIN_TEST_ROWS_PER_CLASS = 5
+MIN_TEST_ROWS = 20
+
+
+def _take(data: Any, idx: np.ndarray) -> Any:
+    """Row-index a DataFrame/Series or array-like."""
+    if hasattr(data, "iloc"):
+        return data.iloc[idx]
+    return np.asarray(data)[idx]
+
+
+def _evaluate(
+    estimator: Any, params: Dict[str, Any], X: Any, y: Any, splits: list, scorer: Any
+) -> Tuple[float, float, Optional[str]]:
+    """Fit and score one configuration on the given splits.
+
+    Returns ``(mean score, score std across folds, error)``. Failing
+    configurations score ``-inf`` so they are never promoted; ``error``
+    carries the exception for the warning.
+    """
+    try:
+        est = clone(estimator).set_params(**params)
+        scores = []
+        for train, test in splits:
+            est.fit(_take(X, train), _take(y, train))
+            scores.append(scorer(est, _take(X, test), _take(y, test)))
+        return float(np.mean(scores)), float(np.std(scores)), None
+    except Exception as exc:
+        return float("-inf"), float("inf"), f"{type(exc).__name__}: {exc}"
+
+
+def _bracket_cost(n_candidates: int, n_rungs: int, eta: int) -> int:
+    """Upper bound on the trials one halving bracket runs over `n_rungs` rungs."""
+    total = 0
+    for _ in range(n_rungs):
+        total += n_candidates
+        n_candidates = max(1, n_candidates // eta)
+    return total
+
+
+def _fit_brackets(brackets: List[tuple], n_rungs: int, eta: int, max_trials: Optional[int]) -> List[tuple]:
+    """Shrink `(n_candidates, start_rung)` brackets until they fit `max_trials`.
+
+    Candidates are removed from the largest bracket first; brackets already
+    down to one candidate are dropped, most aggressive first.
+    """
+    brackets = list(brackets)
+    if max_trials is None:
+        return brackets
+
+    def cost() -> int:
+        return sum(_bracket_cost(n, n_rungs - start, eta) for n, start in brackets)
+
+    while brackets and cost() > max_trials:
+        i = max(range(len(brackets)), key=lambda k: brackets[k][0])
+        n, start = brackets[i]
+        if n > 1:
+            brackets[i] = (n - 1, start)
+        else:
+            brackets.pop(0)
+    return brackets
+
+
+class _Search:
+    """Shared state for one search: data, rung schedule and budget."""
+
+    def __init__(
+        self,
+        estimator: Any,
+        X: Any,
+        y: Any,
+        *,
+        n_rungs: int,
+        eta: int,
+        cv: int,
+        scoring: Any,
+        min_samples: Optional[int],
+        max_trials: Optional[int],
+        time_budget: Optional[float],
+        random_state: Optional[int],
+    ):
+        if eta < 2:
+            raise ValueError("eta must be >= 2")
+        if n_rungs < 1:
+            raise ValueError("n_rungs must be >= 1")
+        self.estimator = estimator
+        self.X = X
+        self.y = y
+        self.eta = eta
+        self.cv = cv
+        self.scorer = check_scoring(estimator, scoring=scoring)
+        self.max_trials = max_trials
+        self.time_budget = time_budget
+        self.random_state = random_state
+        self.records: List[Dict[str, Any]] = []
+        self.stopped: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.start = time.perf_counter()
+
+        n_samples = len(y)
+        y_arr = np.asarray(y)
+        classifier = is_classifier(estimator)
+        per_fold = MIN_TEST_ROWS_PER_CLASS * len(np.unique(y_arr)) if classifier else MIN_TEST_ROWS
+
+        # Rung r is cross-validated with a growing number of folds, ending at
+        # `cv` on the full data. Its sample is at least large enough for
+        # `per_fold` test rows in each of its folds; when that floor exceeds
+        # the data the rung uses every row and only the fold count grows.
+        # Rungs use nested subsamples of one permutation, so a promoted trial
+        # sees a superset of the rows it was first scored on.
+        order = np.random.RandomState(random_state).permutation(n_samples)
+        self.rungs: List[Dict[str, Any]] = []
+        for r in range(n_rungs):
+            folds = cv if r == n_rungs - 1 else max(2, math.ceil(cv * (r + 1) / n_rungs))
+            frac = float(eta) ** (r - (n_rungs - 1))
+            floor = max(min_samples or 0, folds * per_fold)
+            size = n_samples if r == n_rungs - 1 else min(n_samples, max(floor, int(n_samples * frac)))
+            idx = np.sort(order[:size])
+            splits = self._split(idx, y_arr[idx], folds, classifier, random_state)
+            self.rungs.append({"n_samples": int(size), "n_folds": len(splits), "splits": splits})
+
+    @staticmethod
+    def _split(idx: np.ndarray, y_sub: np.ndarray, folds: int, classifier: bool, random_state: Optional[int]) -> list:
+        """CV splits of the rows `idx`, with fewer folds if a class is too rare.
+
+        Stratification needs every class in every fold; if the subsample has a
+        class with fewer than `folds` rows the fold count drops to that class
+        size, and to an unstratified split below two.
+        """
+        folds = min(folds, len(idx))
+        splitter: Any = KFold(n_splits=folds, shuffle=True, random_state=random_state)
+        if classifier:
+            smallest = int(np.unique(y_sub, return_counts=True)[1].min())
+            if smallest >= 2:
+                folds = min(folds, smallest)
+                splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state)
+            else:
+                warnings.warn(
+                    f"a class has {smallest} row(s) in a {len(idx)}-row rung; using unstratified folds",
+                    UserWarning,
+                )
+        return [(idx[train], idx[test]) for train, test in splitter.split(np.zeros(len(idx)), y_sub)]
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def exhausted(self) -> bool:
+        if self.time_budget is not None and self.elapsed() >= self.time_budget:
+            self.stopped = "time_budget"
+        elif self.max_trials is not None and len(self.records) >= self.max_trials:
+            self.stopped = "max_trials"
+        return self.stopped is not None
+
+    def run_bracket(self, parallel: Parallel, candidates: List[Dict[str, Any]], start_rung: int, batch: int) -> None:
+        """Successive halving of `candidates` from `start_rung` to the full rung."""
+        # Candidate order is the last tie-break, so remember it.
+        alive = list(enumerate(candidates))
+        for r in range(start_rung, len(self.rungs)):
+            rung = self.rungs[r]
+            scored = []
+            for i in range(0, len(alive), batch):
+                if self.exhausted():
+                    return
+                chunk = alive[i:i + batch]
+                if self.max_trials is not None:
+                    chunk = chunk[: self.max_trials - len(self.records)]
+                scores = parallel(
+                    delayed(_evaluate)(self.estimator, params, self.X, self.y, rung["splits"], self.scorer)
+                    for _, params in chunk
+                )
+                now = self.elapsed()
+                for (order, params), (score, std, error) in zip(chunk, scores):
+                    if error is not None:
+                        self.last_error = error
+                        warnings.warn(
+                            f"trial failed with params {params}, score set to -inf: {error}",
+                            FitFailedWarning,
+                        )
+                    self.records.append({
+                        "params": params,
+                        "rung": r,
+                        "n_samples": rung["n_samples"],
+                        "n_folds": rung["n_folds"],
+                        "score": score,
+                        "score_std": std,
+                        "elapsed": now,
+                    })
+                    scored.append((score, std, order, params))
+            if r == len(self.rungs) - 1:
+                return
+            # Promote exactly the top 1/eta. Ties on the mean go to the
+            # candidate with the steadier fold scores, then to sampling order.
+            scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+            keep = max(1, len(scored) // self.eta)
+            alive = [(order, params) for score, _, order, params in scored[:keep] if np.isfinite(score)]
+            if not alive:
+                return
+
+    def result(self, refit: bool) -> Dict[str, Any]:
+        finite = [rec for rec in self.records if np.isfinite(rec["score"])]
+        if not finite:
+            if self.stopped is None:
+                raise RuntimeError(f"every trial failed; last error: {self.last_error}")
+            # Running out of budget before the first batch finished is not
+            # an error; report it and let the caller fall back.
+            return {
+                "best_params": None,
+                "best_score": None,
+                "best_estimator": None,
+                "best_rung": None,
+                "full_budget": False,
+                "time_to_best": None,
+                "elapsed": self.elapsed(),
+                "n_trials": len(self.records),
+                "stopped": self.stopped,
+                "trials": self.records,
+            }
+        # Only scores from the highest rung reached are comparable.
+        top = max(rec["rung"] for rec in finite)
+        best = min(
+            (rec for rec in finite if rec["rung"] == top),
+            key=lambda rec: (-rec["score"], rec["score_std"]),
+        )
+        estimator = clone(self.estimator).set_params(**best["params"])
+        if refit:
+            estimator.fit(self.X, self.y)
+        return {
+            "best_params": best["params"],
+            "best_score": best["score"],
+            "best_estimator": estimator,
+            "best_rung": top,
+            "full_budget": top == len(self.rungs) - 1,
+            "time_to_best": best["elapsed"],
+            "elapsed": self.elapsed(),
+            "n_trials": len(self.records),
+            "stopped": self.stopped,
+            "trials": self.records,
+        }
+
+
+def _search(
+    estimator: Any,
+    param_distributions: Dict[str, Any],
+    X: Any,
+    y: Any,
+    brackets: List[tuple],
+    *,
+    n_rungs: int,
+    eta: int,
+    cv: int,
+    scoring: Any,
+    min_samples: Optional[int],
+    n_jobs: int,
+    max_trials: Optional[int],
+    time_budget: Optional[float],
+    refit: bool,
+    random_state: Optional[int],
+) -> Dict[str, Any]:
+    search = _Search(
+        estimator, X, y,
+        n_rungs=n_rungs, eta=eta, cv=cv, scoring=scoring, min_samples=min_samples,
+        max_trials=max_trials, time_budget=time_budget, random_state=random_state,
+    )
+    brackets = _fit_brackets(brackets, n_rungs, eta, max_trials)
+    rng = np.random.RandomState(random_state)
+    batch = effective_n_jobs(n_jobs)
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for n_candidates, start_rung in brackets:
+            if search.exhausted():
+                break
+            candidates = list(ParameterSampler(
+                param_distributions, n_iter=n_candidates, random_state=rng.randint(2 ** 31 - 1)
+            ))
+            search.run_bracket(parallel, candidates, start_rung, batch)
+    return search.result(refit)
+
+
+def successive_halving(
+    estimator: Any,
+    param_distributions: Dict[str, Any],
+    X: Any,
+    y: Any,
+    *,
+    n_candidates: int = 27,
+    n_rungs: int = 3,
+    eta: int = 3,
+    cv: int = 5,
+    scoring: Any = None,
+    min_samples: Optional[int] = None,
+    n_jobs: int = -1,
+    max_trials: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    refit: bool = True,
+    random_state: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Random search with successive halving over sample size and CV folds.
+
+    Rung ``r`` of ``n_rungs`` uses roughly ``n / eta**(n_rungs - 1 - r)`` rows
+    (but at least enough for 5 test rows per class, or 20 for regression, in
+    each fold) and a growing number of folds; the last rung is the full data
+    with ``cv`` folds. Exactly the top ``1/eta`` of each rung is promoted, ties
+    going to the lower fold-score spread and then to sampling order.
+
+    Args:
+        estimator: Unfitted scikit-learn compatible estimator.
+        param_distributions: Dict of lists or scipy distributions, as for
+            `RandomizedSearchCV`.
+        n_candidates: Configurations sampled for the first rung, reduced if
+            needed so the whole schedule fits in ``max_trials``.
+        scoring: Anything accepted by `sklearn.metrics.check_scoring`.
+        min_samples: Lower bound on the rows used by the first rung.
+        n_jobs: Parallel workers; ``-1`` uses every local core.
+        max_trials: Trial budget. One trial is one configuration scored at
+            one rung.
+        time_budget: Stop starting new trials after this many seconds.
+        refit: Fit the best configuration on all of ``X``/``y``.
+
+    Returns a dict with ``best_params``, ``best_score``, ``best_estimator``,
+    ``time_to_best`` (seconds until the best trial finished), ``elapsed``,
+    ``stopped`` (``None`` or the budget that ended the search) and the
+    per-trial history under ``trials``. If the budget runs out before any
+    trial finishes, the ``best_*`` and ``time_to_best`` entries are ``None``.
+    Failing trials emit a `FitFailedWarning`; if every trial fails a
+    `RuntimeError` is raised.
+    """
+    return _search(
+        estimator, param_distributions, X, y, [(n_candidates, 0)],
+        n_rungs=n_rungs, eta=eta, cv=cv, scoring=scoring, min_samples=min_samples,
+        n_jobs=n_jobs, max_trials=max_trials, time_budget=time_budget,
+        refit=refit, random_state=random_state,
+    )
+
+
+def hyperband(
+    estimator: Any,
+    param_distributions: Dict[str, Any],
+    X: Any,
+    y: Any,
+    *,
+    n_candidates: Optional[int] = None,
+    n_rungs: int = 3,
+    eta: int = 3,
+    cv: int = 5,
+    scoring: Any = None,
+    min_samples: Optional[int] = None,
+    n_jobs: int = -1,
+    max_trials: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    refit: bool = True,
+    random_state: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Hyperband: successive halving brackets from most to least aggressive.
+
+    The first bracket starts many candidates on the smallest rung; the last
+    one runs a few candidates on the full budget only. ``n_candidates`` sets
+    the size of the first bracket (default ``eta**(n_rungs - 1)``) and scales
+    the others with it. Other arguments and the returned dict are the same as
+    for `successive_halving`; the budgets are shared across brackets.
+    """
+    s_max = n_rungs - 1
+    brackets = [
+        (math.ceil((s_max + 1) / (s + 1) * eta ** s), s_max - s)
+        for s in range(s_max, -1, -1)
+    ]
+    if n_candidates is not None:
+        scale = n_candidates / brackets[0][0]
+        brackets = [(max(1, round(n * scale)), start) for n, start in brackets]
+    return _search(
+        estimator, param_distributions, X, y, brackets,
+        n_rungs=n_rungs, eta=eta, cv=cv, scoring=scoring, min_samples=min_samples,
+        n_jobs=n_jobs, max_trials=max_trials, time_budget=time_budget,
+        refit=refit, random_state=random_state,
+    )
+
+
+def _pycaret_module(task: str) -> Any:
+    task = (task or "classification").lower()
+    module_name = "pycaret.classification" if task.startswith("class") else "pycaret.regression"
+    return importlib.import_module(module_name)
+
+
+def pycaret_tune_grid(model: Any, task: str = "classification") -> Dict[str, list]:
+    """Return PyCaret's built-in tuning grid for `model`.
+
+    This is the grid `tune_model` samples from by default, so both searches
+    cover the same space.
+    """
+    mod = _pycaret_module(task)
+    table = mod.models(internal=True)
+    for _, row in table.iterrows():
+        if type(model) is row["Class"]:
+            return dict(row["Tune Grid"])
+    raise RuntimeError(f"no tuning grid in '{mod.__name__}' for {model.__class__.__name__}")
+
+
+def time_to_best_report(
+    result: Dict[str, Any],
+    baseline_seconds: Optional[float] = None,
+    baseline_score: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Summarise a search result, optionally against a baseline `tune_model` run.
+
+    `tune_model` only reports its best model at the end, so its time-to-best
+    is its total runtime. Comparison entries are ``None`` without a baseline
+    or when the search found no best trial.
+    """
+    ttb = result["time_to_best"]
+    best = result["best_score"]
+    speedup = None
+    if ttb is not None and baseline_seconds is not None:
+        speedup = baseline_seconds / ttb if ttb > 0 else float("inf")
+    delta = None
+    if best is not None and baseline_score is not None:
+        delta = best - baseline_score
+    return {
+        "search_time_to_best": ttb,
+        "search_elapsed": result["elapsed"],
+        "search_best_score": best,
+        "search_trials": result["n_trials"],
+        "search_full_budget": result["full_budget"],
+        "search_stopped": result["stopped"],
+        "baseline_time_to_best": baseline_seconds,
+        "baseline_score": baseline_score,
+        "speedup": speedup,
+        "score_delta": delta,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a `time_to_best_report` dict as aligned ``key: value`` lines."""
+    width = max(len(key) for key in report)
+    lines = []
+    for key, value in report.items():
+        if isinstance(value, float):
+            value = f"{value:.4f}"
+        lines.append(f"{key.ljust(width)} : {value}")
+    return "\n".join(lines)
+
+
+def search_tune_model(
+    model: Any,
+    task: str = "classification",
+    method: str = "halving",
+    compare: bool = False,
+    **search_kwargs: Any,
+) -> Tuple[Any, Dict[str, Any]]:
+    """Tune `model` with a budget-aware search instead of `tune_model`.
+
+    Must run after PyCaret `setup`. The search (``"halving"`` or
+    ``"hyperband"``) samples PyCaret's tuning grid for `model` and uses the
+    transformed training data with the same number of folds as `setup`. The
+    winner is then cross-validated with `create_model`, which makes it a
+    regular PyCaret model and gives ``search_pycaret_score``.
+
+    With ``compare=True`` a default `tune_model(model)` is timed first as a
+    baseline, the report compares the two and the better-scoring model is
+    returned. This doubles the tuning cost, so it is meant for benchmarking.
+
+    Returns ``(tuned_model, report)``. If the budget ran out before any trial
+    finished, ``tuned_model`` is the baseline, or `model` itself without one.
+    """
+    searches = {"halving": successive_halving, "hyperband": hyperband}
+    if method not in searches:
+        raise ValueError(f"unknown tuning method '{method}', expected one of {sorted(searches)}")
+    mod = _pycaret_module(task)
+    classification = mod.__name__.endswith("classification")
+    metric = "Accuracy" if classification else "R2"
+
+    baseline = baseline_seconds = baseline_score = None
+    if compare:
+        start = time.perf_counter()
+        baseline = mod.tune_model(model, verbose=False)
+        baseline_seconds = time.perf_counter() - start
+        baseline_score = float(mod.pull().loc["Mean", metric])
+
+    try:
+        X = mod.get_config("X_train_transformed")
+        y = mod.get_config("y_train_transformed")
+    except Exception:
+        # PyCaret 2.x exposes the transformed training data as X_train.
+        X = mod.get_config("X_train")
+        y = mod.get_config("y_train")
+    folds = getattr(mod.get_config("fold_generator"), "n_splits", 10)
+    search_kwargs.setdefault("cv", folds)
+    search_kwargs.setdefault("scoring", "accuracy" if classification else "r2")
+    search_kwargs.setdefault("refit", False)
+    result = searches[method](model, pycaret_tune_grid(model, task), X, y, **search_kwargs)
+
+    report = time_to_best_report(result, baseline_seconds, baseline_score)
+    report["search_method"] = method
+    report["search_pycaret_score"] = None
+    tuned, selected = (baseline, "baseline") if compare else (model, "untuned")
+    if result["best_estimator"] is not None:
+        candidate = mod.create_model(result["best_estimator"], verbose=False)
+        score = float(mod.pull().loc["Mean", metric])
+        report["search_pycaret_score"] = score
+        if baseline_score is None or score >= baseline_score:
+            tuned, selected = candidate, method
+    report["selected"] = selected
+    return tuned, report
+
+
+def search_options_from_env(environ: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Read `search_tune_model` keyword arguments from the environment.
+
+    ``PYCARET_TUNE_CANDIDATES``, ``PYCARET_TUNE_MAX_TRIALS`` and
+    ``PYCARET_TUNE_TIME_BUDGET`` (seconds) set the search size and budgets;
+    ``PYCARET_TUNE_COMPARE=1`` also runs the timed `tune_model` baseline.
+    """
+    env = os.environ if environ is None else environ
+    options: Dict[str, Any] = {"compare": env.get("PYCARET_TUNE_COMPARE", "").lower() in ("1", "true", "yes")}
+    for name, key, cast in (
+        ("PYCARET_TUNE_CANDIDATES", "n_candidates", int),
+        ("PYCARET_TUNE_MAX_TRIALS", "max_trials", int),
+        ("PYCARET_TUNE_TIME_BUDGET", "time_budget", float),
+    ):
+        if env.get(name):
+            options[key] = cast(env[name])
+    return options
+
+
+__all__ = [
+    "successive_halving",
+    "hyperband",
+    "pycaret_tune_grid",
+    "time_to_best_report",
+    "format_report",
+    "search_tune_model",
+    "search_options_from_env",
+]
@@ -1,5 +1,7 @@
+import os
 import pandas as pd
 from pycaret.classification import *
+from pycaret_mcp.tuning import format_report, search_options_from_env, search_tune_model
 
 # Load sample dataset (Iris dataset for classification)
 from sklearn.datasets import load_iris
@@ -13,8 +15,19 @@ clf_setup = setup(data, target='target', session_id=123)
 # Compare models
 best_model = compare_models()
 
-# Create and tune the best model
-tuned_model = tune_model(best_model)
+# Create and tune the best model.
+# PYCARET_TUNE_MODE=halving|hyperband tunes with a budget-aware search instead
+# (size and budgets: PYCARET_TUNE_CANDIDATES, PYCARET_TUNE_MAX_TRIALS,
+# PYCARET_TUNE_TIME_BUDGET seconds). PYCARET_TUNE_COMPARE=1 also times the
+# default tune_model run and reports time-to-best against it.
+tune_mode = os.environ.get("PYCARET_TUNE_MODE", "random")
+if tune_mode == "random":
+    tuned_model = tune_model(best_model)
+else:
+    tuned_model, report = search_tune_model(
+        best_model, method=tune_mode, random_state=123, **search_options_from_env()
+    )
+    print(format_report(report))
 
 # Evaluate the model
 evaluate_model(tuned_model)
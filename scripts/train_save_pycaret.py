@@ -2,14 +2,21 @@
 
 This script is intentionally minimal and intended for CI/dev integration tests.
 It uses the `iris` dataset from `pycaret.datasets` and a classification workflow.
+
+Set ``PYCARET_TUNE_MODE`` to ``random`` (PyCaret `tune_model`), ``halving`` or
+``hyperband`` to tune the selected model before saving. The last two read
+``PYCARET_TUNE_CANDIDATES``, ``PYCARET_TUNE_MAX_TRIALS`` and
+``PYCARET_TUNE_TIME_BUDGET`` (seconds); ``PYCARET_TUNE_COMPARE=1`` also times
+`tune_model` and reports time-to-best against it.
 """
+import os
 from pathlib import Path
 
 
 def main():
     try:
         from pycaret.datasets import get_data
-        from pycaret.classification import setup, compare_models, finalize_model, save_model
+        from pycaret.classification import setup, compare_models, finalize_model, save_model, tune_model
     except Exception as exc:  # pragma: no cover - import-time environment-dependent
         raise RuntimeError("pycaret is required to run training script") from exc
 
@@ -17,6 +24,18 @@ def main():
     # setup for a quick run (session_id for reproducibility)
     s = setup(df, target="species", session_id=123, silent=True, html=False)
     model = compare_models()
+
+    tune_mode = os.environ.get("PYCARET_TUNE_MODE")
+    if tune_mode == "random":
+        model = tune_model(model)
+    elif tune_mode:
+        from pycaret_mcp.tuning import format_report, search_options_from_env, search_tune_model
+
+        model, report = search_tune_model(
+            model, method=tune_mode, random_state=123, **search_options_from_env()
+        )
+        print(format_report(report))
+
     final = finalize_model(model)
 
     out_dir = Path("models")
@@ -0,0 +1,275 @@
+import math
+import sys
+from types import ModuleType
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.datasets import load_iris, make_classification
+from sklearn.dummy import DummyClassifier
+from sklearn.exceptions import FitFailedWarning
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+
+import pycaret_mcp.tuning as tu
+
+
+@pytest.fixture
+def iris():
+    data = load_iris()
+    return data.data, data.target
+
+
+def test_successive_halving_promotes_top_fraction():
+    X, y = make_classification(n_samples=1800, n_classes=3, n_informative=4, random_state=0)
+    res = tu.successive_halving(
+        DecisionTreeClassifier(random_state=0),
+        {"max_depth": [1, 2, 3, 4, 6, 8, 12, None], "min_samples_leaf": [1, 2, 4, 8, 16, 32]},
+        X, y, n_candidates=9, n_rungs=3, eta=3, n_jobs=1, random_state=0,
+    )
+    per_rung = [sum(1 for t in res["trials"] if t["rung"] == r) for r in range(3)]
+    assert per_rung == [9, 3, 1]
+    rungs = sorted({(t["rung"], t["n_samples"], t["n_folds"]) for t in res["trials"]})
+    assert rungs == [(0, 200, 2), (1, 600, 4), (2, 1800, 5)]
+    assert res["full_budget"] and res["stopped"] is None
+    assert res["n_trials"] == sum(per_rung)
+    assert 0 < res["time_to_best"] <= res["elapsed"]
+    assert res["best_estimator"].predict(X[:3]).shape == (3,)
+
+
+def _per_rung(res, n_rungs=3):
+    return [sum(1 for t in res["trials"] if t["rung"] == r) for r in range(n_rungs)]
+
+
+def test_tied_scores_promote_at_most_top_fraction(iris):
+    # Every candidate scores the same; promotion must still halve.
+    X, y = iris
+    res = tu.successive_halving(
+        DummyClassifier(strategy="prior"),
+        {"random_state": list(range(27))},
+        X, y, n_candidates=27, n_rungs=3, eta=3, n_jobs=1, refit=False, random_state=0,
+    )
+    per_rung = _per_rung(res)
+    assert per_rung[0] == 27
+    for prev, cur in zip(per_rung, per_rung[1:]):
+        assert cur <= math.ceil(prev / 3)
+    assert res["full_budget"]
+
+
+def test_max_trials_shrinks_schedule_to_reach_last_rung(iris):
+    X, y = iris
+    res = tu.successive_halving(
+        LogisticRegression(max_iter=500),
+        {"C": list(np.logspace(-3, 3, 40))},
+        X, y, n_candidates=27, n_jobs=1, max_trials=20, refit=False, random_state=0,
+    )
+    assert _per_rung(res) == [14, 4, 1]
+    assert res["n_trials"] <= 20
+    assert res["full_budget"] and res["stopped"] is None
+
+
+def test_max_trials_shrinks_hyperband_brackets(iris):
+    X, y = iris
+    res = tu.hyperband(
+        LogisticRegression(max_iter=500),
+        {"C": list(np.logspace(-3, 3, 40))},
+        X, y, n_jobs=1, max_trials=10, refit=False, random_state=0,
+    )
+    assert res["n_trials"] <= 10
+    assert res["full_budget"]
+
+
+def test_time_budget_stops_search(iris):
+    X, y = iris
+    res = tu.hyperband(
+        LogisticRegression(max_iter=200),
+        {"C": [0.01, 0.1, 1.0, 10.0]},
+        X, y, n_jobs=1, time_budget=0.0, refit=False, random_state=0,
+    )
+    assert res["stopped"] == "time_budget"
+    assert res["n_trials"] == 0
+    assert res["best_params"] is None and res["best_estimator"] is None
+    assert res["time_to_best"] is None
+
+    report = tu.time_to_best_report(res, baseline_seconds=1.0, baseline_score=0.9)
+    assert report["speedup"] is None and report["score_delta"] is None
+
+
+def test_hyperband_runs_every_bracket(iris):
+    X, y = iris
+    res = tu.hyperband(
+        LogisticRegression(max_iter=500),
+        {"C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0, 100.0]},
+        X, y, n_rungs=3, eta=3, n_jobs=2, refit=False, random_state=0,
+    )
+    assert {t["rung"] for t in res["trials"]} == {0, 1, 2}
+    assert res["full_budget"]
+    assert res["best_score"] > 0.9
+
+
+def test_failing_trials_are_not_promoted(iris):
+    X, y = iris
+    with pytest.warns(FitFailedWarning, match="C"):
+        res = tu.successive_halving(
+            LogisticRegression(max_iter=500),
+            {"C": [-1.0, 1.0]},
+            X, y, n_candidates=2, n_rungs=2, eta=2, n_jobs=1, refit=False, random_state=0,
+        )
+    assert res["best_params"] == {"C": 1.0}
+
+
+def test_every_trial_failing_raises_with_cause(iris):
+    X, y = iris
+    with pytest.warns(FitFailedWarning), pytest.raises(RuntimeError, match="InvalidParameterError|ValueError"):
+        tu.successive_halving(
+            LogisticRegression(),
+            {"C": [-1.0, -2.0]},
+            X, y, n_candidates=2, n_jobs=1, refit=False, random_state=0,
+        )
+
+
+def test_best_config_survives_first_rung(iris):
+    # Only one of three candidates is promoted per rung, so the first rung has
+    # to rank max_depth=1 (about 0.67 accuracy) below the deeper trees.
+    X, y = iris
+    res = tu.successive_halving(
+        DecisionTreeClassifier(random_state=0),
+        {"max_depth": [1, 2, 3]},
+        X, y, n_candidates=3, n_rungs=3, eta=3, n_jobs=1, refit=False, random_state=0,
+    )
+    assert _per_rung(res) == [3, 1, 1]
+    assert res["best_params"]["max_depth"] != 1
+    assert res["best_score"] > 0.9
+
+
+def test_small_data_rungs_fall_back_to_halving_folds(iris):
+    # 105 rows with 10 folds (PyCaret's default): the first rung is a
+    # subsample; the middle rung's floor exceeds the data so it uses every
+    # row and only its fold count differs from the last rung.
+    X, y = iris
+    idx = np.random.RandomState(0).permutation(len(y))[:105]
+    res = tu.successive_halving(
+        LogisticRegression(max_iter=500),
+        {"C": list(np.logspace(-3, 3, 40))},
+        X[idx], y[idx], n_candidates=9, cv=10, n_jobs=1, refit=False, random_state=0,
+    )
+    rungs = sorted({(t["rung"], t["n_samples"], t["n_folds"]) for t in res["trials"]})
+    assert rungs == [(0, 60, 4), (1, 105, 7), (2, 105, 10)]
+
+
+def test_rare_class_reduces_fold_count():
+    X, y = make_classification(n_samples=404, n_classes=3, n_informative=4, random_state=0)
+    y = np.where(np.arange(len(y)) < 4, 2, y % 2)
+    res = tu.successive_halving(
+        LogisticRegression(max_iter=500),
+        {"C": [0.1, 1.0, 10.0]},
+        X, y, n_candidates=3, cv=5, n_jobs=1, refit=False, random_state=0,
+    )
+    last = [t for t in res["trials"] if t["rung"] == 2]
+    assert last and last[0]["n_folds"] == 4
+
+
+def test_pandas_input(iris):
+    X, y = iris
+    Xdf = pd.DataFrame(X, index=range(100, 100 + len(y)))
+    ys = pd.Series(y, index=Xdf.index)
+    res = tu.successive_halving(
+        LogisticRegression(max_iter=500),
+        {"C": [0.1, 1.0, 10.0]},
+        Xdf, ys, n_candidates=3, n_jobs=1, random_state=0,
+    )
+    assert res["best_score"] > 0.9
+
+
+def test_pycaret_tune_grid_matches_class(monkeypatch):
+    table = pd.DataFrame({
+        "Class": [DecisionTreeClassifier, LogisticRegression],
+        "Tune Grid": [{"max_depth": [1, 2]}, {"C": [0.1, 1.0]}],
+    })
+    mod = ModuleType("pycaret.classification")
+    mod.models = lambda internal=False: table
+    monkeypatch.setitem(sys.modules, "pycaret.classification", mod)
+
+    assert tu.pycaret_tune_grid(LogisticRegression()) == {"C": [0.1, 1.0]}
+    with pytest.raises(RuntimeError):
+        tu.pycaret_tune_grid(object())
+
+
+def test_time_to_best_report():
+    res = {"time_to_best": 2.0, "elapsed": 3.0, "best_score": 0.97, "n_trials": 13, "full_budget": True, "stopped": None}
+    report = tu.time_to_best_report(res, baseline_seconds=8.0, baseline_score=0.95)
+    assert report["speedup"] == 4.0
+    assert report["score_delta"] == pytest.approx(0.02)
+
+
+def _fake_pycaret(monkeypatch, iris, calls, scores):
+    from sklearn.model_selection import StratifiedKFold
+
+    X, y = iris
+
+    def fake_tune_model(model, verbose=True):
+        calls.append("tune_model")
+        return "baseline-model"
+
+    def fake_create_model(estimator, verbose=True):
+        calls.append("create_model")
+        return estimator
+
+    config = {
+        "X_train_transformed": pd.DataFrame(X),
+        "y_train_transformed": pd.Series(y),
+        "fold_generator": StratifiedKFold(n_splits=4),
+    }
+    mod = ModuleType("pycaret.classification")
+    mod.models = lambda internal=False: pd.DataFrame({
+        "Class": [LogisticRegression], "Tune Grid": [{"C": [0.1, 1.0, 10.0]}],
+    })
+    mod.tune_model = fake_tune_model
+    mod.create_model = fake_create_model
+    mod.pull = lambda: pd.DataFrame({"Accuracy": [next(scores)]}, index=["Mean"])
+    mod.get_config = config.__getitem__
+    monkeypatch.setitem(sys.modules, "pycaret.classification", mod)
+
+
+def test_search_tune_model_skips_baseline_by_default(monkeypatch, iris):
+    calls = []
+    _fake_pycaret(monkeypatch, iris, calls, iter([0.95]))
+
+    tuned, report = tu.search_tune_model(LogisticRegression(max_iter=500), n_jobs=1, random_state=0)
+    assert calls == ["create_model"]
+    assert isinstance(tuned, LogisticRegression)
+    assert report["selected"] == "halving"
+    assert report["baseline_time_to_best"] is None and report["speedup"] is None
+    assert report["search_pycaret_score"] == 0.95
+
+    with pytest.raises(ValueError):
+        tu.search_tune_model(LogisticRegression(), method="grid")
+
+
+def test_search_tune_model_compare_times_tune_model(monkeypatch, iris):
+    calls = []
+    _fake_pycaret(monkeypatch, iris, calls, iter([0.90, 0.95]))
+
+    tuned, report = tu.search_tune_model(
+        LogisticRegression(max_iter=500), method="hyperband", compare=True, n_jobs=1, random_state=0,
+    )
+    assert calls == ["tune_model", "create_model"]
+    assert isinstance(tuned, LogisticRegression)
+    assert report["selected"] == "hyperband"
+    assert report["baseline_score"] == 0.90
+    assert report["baseline_time_to_best"] > 0
+    assert report["search_time_to_best"] <= report["search_elapsed"]
+    assert "speedup" in tu.format_report(report)
+
+
+def test_search_options_from_env():
+    opts = tu.search_options_from_env({
+        "PYCARET_TUNE_CANDIDATES": "30",
+        "PYCARET_TUNE_MAX_TRIALS": "40",
+        "PYCARET_TUNE_TIME_BUDGET": "60",
+        "PYCARET_TUNE_COMPARE": "1",
+    })
+    assert opts == {"compare": True, "n_candidates": 30, "max_trials": 40, "time_budget": 60.0}
+    assert tu.search_options_from_env({}) == {"compare": False}
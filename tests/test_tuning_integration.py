@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture(scope="module")
+def best_model():
+    # Skip integration locally if pycaret not available
+    pytest.importorskip("pycaret")
+    from sklearn.datasets import load_iris
+    from pycaret.classification import setup, compare_models
+
+    iris = load_iris()
+    data = pd.DataFrame(data=iris.data, columns=iris.feature_names)
+    data["target"] = iris.target
+    setup(data, target="target", session_id=123, html=False, verbose=False)
+    return compare_models(include=["lr", "dt", "knn"], verbose=False)
+
+
+def test_pycaret_tune_grid_for_compare_models_result(best_model):
+    from pycaret_mcp.tuning import pycaret_tune_grid
+
+    grid = pycaret_tune_grid(best_model)
+    assert grid, "empty tuning grid"
+    assert set(grid) <= set(best_model.get_params())
+
+
+def test_search_tune_model_against_tune_model(best_model):
+    from pycaret_mcp.tuning import search_tune_model
+
+    tuned, report = search_tune_model(
+        best_model, method="halving", compare=True, max_trials=20, random_state=123
+    )
+    assert report["baseline_time_to_best"] > 0
+    assert 0 <= report["baseline_score"] <= 1
+    assert report["search_trials"] <= 20
+    assert report["search_full_budget"]
+    assert report["search_pycaret_score"] is not None
+    assert report["selected"] in ("baseline", "halving")
+    assert hasattr(tuned, "predict")